@@ -1,9 +1,25 @@
 # app.py — Vercel-ready Flask backend with Rainforest API + optional Gmail email send
-import os, time, uuid, json, requests, smtplib, ssl
-from urllib.parse import urlparse
-from email.message import EmailMessage
+import os
+
+# Under gunicorn's gevent worker (see Procfile) patch sockets/threads before
+# httpx/smtplib are imported so their blocking I/O yields to other greenlets.
+if os.getenv("GEVENT"):
+    from gevent import monkey
+    monkey.patch_all()
+
+import re, time, secrets, atexit, functools, hashlib, copy, threading
+import httpx
+import orjson
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import dns.resolver
+from cachetools import TTLCache
+from email_validator import validate_email, EmailNotValidError, EmailUndeliverableError
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from flask_compress import Compress
+from worker import LEADS_KEY, LEADS_FLUSH_KEY, LEADS_MAX, send_list_email, send_lead_digest, flush_lead_digest
 
 # Try to load .env locally; on Vercel we rely on project env vars
 try:
@@ -15,90 +31,322 @@ except Exception:
 app = Flask(__name__)
 CORS(app)
 
-# ---------- Email helpers (Option A: Gmail SMTP + App Password) ----------
-def _absolutize(url: str) -> str:
-    """Return absolute URL; if already absolute, return as-is."""
+# Compress JSON responses (brotli when the client accepts it, else gzip).
+# COMPRESS_LEVEL is gzip-only; brotli has its own knob. Streamed responses are
+# left alone, since flask-compress would buffer them whole to compress them.
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_LEVEL'] = 6
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+
+# Outbound email is slow, blocking I/O (SMTP handshake + AUTH). With Redis it is
+# handed to the RQ worker fleet (worker.py); otherwise it runs on this small
+# in-process pool so it stays off the request path.
+# Kept well under Gmail's ~15 concurrent SMTP sessions per account.
+EMAIL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="email")
+
+# Vercel freezes the instance once the response is sent, so background threads
+# can't be relied on there. Without REDIS_URL (no RQ), email is sent inline on
+# Vercel -- slower, but delivered, as before. Set REDIS_URL to take it off the
+# request path.
+ON_VERCEL = bool(os.environ.get('VERCEL'))
+
+# Delivery status by delivery_id, polled via /api/email-status/<delivery_id>.
+# With Redis it is shared, so any instance/worker can answer a poll. The
+# in-memory copy only answers polls that reach the same process, so without
+# Redis the status URL is handed out only by the single-process dev server
+# (LOCAL_DELIVERY_STATUS, set in __main__) -- not under gunicorn or on Vercel.
+DELIVERY_STATUS_TTL = 3600
+_DELIVERIES = TTLCache(maxsize=10_000, ttl=DELIVERY_STATUS_TTL)
+_DELIVERIES_LOCK = threading.Lock()
+LOCAL_DELIVERY_STATUS = False
+
+def _set_delivery_status(delivery_id: str, status: dict) -> None:
+    with _DELIVERIES_LOCK:
+        _DELIVERIES[delivery_id] = status
+    _redis_set_json(f"delivery:{delivery_id}", status, DELIVERY_STATUS_TTL)
+
+def _get_delivery_status(delivery_id: str) -> dict | None:
+    with _DELIVERIES_LOCK:
+        status = _DELIVERIES.get(delivery_id)
+    if status is None:
+        status = _redis_get_json(f"delivery:{delivery_id}")
+    if status is None:
+        status = _rq_delivery_status(delivery_id)
+    return status
+
+def _delivery_status_pollable() -> bool:
+    return REDIS is not None or LOCAL_DELIVERY_STATUS
+
+def _deliver_email(delivery_id: str, user_email: str, title: str, products: list) -> None:
+    """In-process fallback job: send one list email and record the outcome."""
+    try:
+        status = send_list_email(user_email, title, products, raise_on_failure=False)
+    except Exception as e:
+        status = {'sent': False, 'reason': f'{type(e).__name__}: {e}'}
+    _set_delivery_status(delivery_id, status)
+
+# ---------- Email validation ----------
+# Deliverability is a DNS MX lookup per domain. Only definitive answers
+# (domain doesn't exist / takes no mail) are remembered, for 10 minutes;
+# timeouts and resolver errors let the address through uncached.
+MX_TIMEOUT = 3
+_MX_CACHE = TTLCache(maxsize=2048, ttl=600)
+_MX_CACHE_LOCK = threading.Lock()
+
+def _domain_accepts_mail(domain: str) -> bool:
+    with _MX_CACHE_LOCK:
+        hit = _MX_CACHE.get(domain)
+    if hit is not None:
+        return hit
     try:
-        u = urlparse(url or "")
-        if u.scheme and u.netloc:
-            return url
+        info = validate_email(f"postmaster@{domain}", check_deliverability=True, timeout=MX_TIMEOUT)
+    except EmailUndeliverableError as e:
+        if e.__cause__ is not None and not isinstance(e.__cause__, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+            return True  # "error while checking": resolver trouble, not an answer
+        ok = False
+    except EmailNotValidError:
+        ok = False
+    else:
+        if getattr(info, 'unknown-deliverability', None):
+            return True  # timeout / no nameservers
+        ok = True
+    with _MX_CACHE_LOCK:
+        _MX_CACHE[domain] = ok
+    return ok
+
+def safe_email(s: str) -> bool:
+    """True if `s` is a well-formed address whose domain can receive mail."""
+    try:
+        domain = validate_email(s, check_deliverability=False).domain
+    except EmailNotValidError:
+        return False
+    return _domain_accepts_mail(domain)
+
+# Admin lead pings are coalesced into one digest email, never sent per lead.
+# With Redis, leads are appended to a shared Redis list (LEADS_KEY) and an RQ
+# job (worker.flush_lead_digest) mails the digest: scheduled LEAD_FLUSH_SECONDS
+# after the first pending lead, or at once when LEAD_FLUSH_SIZE are waiting.
+# Without Redis they fall back to an in-process buffer drained by a background
+# thread; on Vercel, which freezes instances between invocations so that
+# thread/atexit can't be relied on, the no-Redis fallback sends inline.
+LEAD_FLUSH_SECONDS = 60
+LEAD_FLUSH_SIZE = 20
+LEAD_BUFFER_MAX = LEADS_MAX
+LEAD_BUFFER = deque()  # (generated_at, user_email, prompt, req_id); oldest dropped past LEAD_BUFFER_MAX
+LEADS_INLINE = ON_VERCEL
+_LEAD_WAKE = threading.Event()
+
+def _queue_lead_redis(lead: tuple) -> bool:
+    """Append a lead to the shared Redis list and make sure a flush job is coming."""
+    if EMAIL_QUEUE is None:
+        return False
+    try:
+        pipe = REDIS.pipeline()
+        pipe.rpush(LEADS_KEY, orjson.dumps(lead))
+        pipe.ltrim(LEADS_KEY, -LEADS_MAX, -1)
+        pipe.llen(LEADS_KEY)
+        pending = pipe.execute()[-1]
     except Exception:
-        pass
-    return url  # your links are already absolute; keep as safety
+        return False  # Redis unavailable; use the in-process fallback
+    job_kw = dict(job_timeout=60, retry=RqRetry(max=3, interval=[60, 300, 900]))
+    try:
+        if pending == LEAD_FLUSH_SIZE:
+            EMAIL_QUEUE.enqueue(flush_lead_digest, **job_kw)
+        elif REDIS.set(LEADS_FLUSH_KEY, 1, nx=True, ex=LEAD_FLUSH_SECONDS):
+            EMAIL_QUEUE.enqueue_in(timedelta(seconds=LEAD_FLUSH_SECONDS), flush_lead_digest, **job_kw)
+    except Exception:
+        pass  # lead is stored; the next lead's scheduling picks it up
+    return True
+
+def notify_admin_lead(user_email: str, prompt: str, req_id: str) -> None:
+    """Queue a lead for the next admin digest (or, on Vercel without Redis, send it now)."""
+    lead = (time.strftime('%Y-%m-%d %H:%M:%S'), user_email, prompt, req_id)
+    if _queue_lead_redis(lead):
+        return
+    LEAD_BUFFER.append(lead)
+    _trim_lead_buffer()
+    if LEADS_INLINE:
+        flush_admin_leads()
+    elif len(LEAD_BUFFER) >= LEAD_FLUSH_SIZE:
+        _LEAD_WAKE.set()
+
+def _trim_lead_buffer() -> None:
+    while len(LEAD_BUFFER) > LEAD_BUFFER_MAX:
+        try:
+            LEAD_BUFFER.popleft()
+        except IndexError:
+            break
+
+def flush_admin_leads() -> dict | None:
+    leads = []
+    while LEAD_BUFFER:
+        try:
+            leads.append(LEAD_BUFFER.popleft())
+        except IndexError:
+            break
+    if not leads:
+        return None
+    status = send_lead_digest(leads)
+    if not status.get('sent') and status.get('reason') != 'missing_admin_or_auth':
+        LEAD_BUFFER.extendleft(reversed(leads))  # SMTP failure: keep them for the next flush
+        _trim_lead_buffer()
+    return status
 
-def send_email_html(to_email: str, subject: str, html_body: str, bcc: str | None = None) -> dict:
+def _lead_flusher() -> None:
+    while True:
+        _LEAD_WAKE.wait(LEAD_FLUSH_SECONDS)
+        _LEAD_WAKE.clear()
+        try:
+            flush_admin_leads()
+        except Exception:
+            pass
+
+if not LEADS_INLINE:
+    threading.Thread(target=_lead_flusher, name="lead-digest", daemon=True).start()
+    atexit.register(flush_admin_leads)
+
+# ---------- Shared HTTP client ----------
+# One keep-alive HTTP/2 client for all outbound HTTPS: concurrent calls to the
+# same host multiplex over a single TCP + TLS connection. Connect failures are
+# retried once by the transport; 429/5xx responses by _get_with_retry.
+HTTP = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=1,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    ),
+    timeout=httpx.Timeout(20, connect=3),
+)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_AFTER_MAX = 2  # longer Retry-After: give up rather than hold the request
+
+def _get_with_retry(url: str, retries: int = 3, backoff: float = 0.5, budget: float = 20, **kwargs) -> httpx.Response:
     """
-    Send HTML email via Gmail SMTP. Requires:
-      - EMAIL_USER = your Gmail address
-      - EMAIL_PASSWORD = 16-char App Password (not your normal password)
-    Returns: {'sent': True} or {'sent': False, 'reason': '...'}
+    GET with exponential backoff on retryable statuses. All attempts and
+    sleeps share one `budget` (seconds) so a request thread is never held
+    much past it; a Retry-After above RETRY_AFTER_MAX is not waited out.
     """
-    sender = os.environ.get('EMAIL_USER')
-    password = os.environ.get('EMAIL_PASSWORD')
-    if not sender or not password or not to_email:
-        return {'sent': False, 'reason': 'missing_email_config_or_to'}
-
-    msg = EmailMessage()
-    msg['From'] = f"AI4U Top 10 <{sender}>"
-    msg['To'] = to_email
-    if bcc:
-        msg['Bcc'] = bcc
-    msg['Subject'] = subject
-    msg.set_content("HTML email. Please view with an HTML-capable client.")
-    msg.add_alternative(html_body, subtype='html')
-
-    # Prefer SSL 465; fallback to STARTTLS 587
+    deadline = time.monotonic() + budget
+    for attempt in range(retries + 1):
+        remaining = deadline - time.monotonic()
+        resp = HTTP.get(url, timeout=httpx.Timeout(remaining, connect=min(3, remaining)), **kwargs)
+        if resp.status_code not in RETRY_STATUSES or attempt == retries:
+            return resp
+        delay = backoff * (2 ** attempt)
+        retry_after = resp.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            if int(retry_after) > RETRY_AFTER_MAX:
+                return resp
+            delay = max(delay, int(retry_after))
+        if time.monotonic() + delay >= deadline:
+            return resp
+        time.sleep(delay)
+        if time.monotonic() >= deadline:
+            return resp  # overslept the budget; a non-positive httpx timeout would raise
+
+# ---------- Optional Redis (cache shared across instances) ----------
+# Only used when REDIS_URL is set (e.g. Upstash on Vercel); any Redis error
+# degrades to a cache miss rather than failing the request.
+REDIS = None
+if os.environ.get('REDIS_URL'):
     try:
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-            server.login(sender, password)
-            server.send_message(msg)
-        return {'sent': True}
+        import redis
+        REDIS = redis.Redis.from_url(
+            os.environ['REDIS_URL'], decode_responses=False, socket_connect_timeout=1, socket_timeout=1
+        )
     except Exception:
-        try:
-            with smtplib.SMTP("smtp.gmail.com", 587, timeout=20) as server:
-                server.ehlo()
-                server.starttls(context=ssl.create_default_context())
-                server.login(sender, password)
-                server.send_message(msg)
-            return {'sent': True}
-        except Exception as e2:
-            return {'sent': False, 'reason': f'{type(e2).__name__}: {e2}'}
-
-def send_admin_lead(user_email: str, prompt: str) -> dict:
-    """Optional: notify ADMIN_EMAIL a lead was captured (best-effort)."""
-    sender = os.environ.get('EMAIL_USER')
-    password = os.environ.get('EMAIL_PASSWORD')
-    admin = os.environ.get('ADMIN_EMAIL') or None
-    if not sender or not password or not admin:
-        return {'sent': False, 'reason': 'missing_admin_or_auth'}
-
-    msg = EmailMessage()
-    msg['From'] = f"AI4U Top 10 <{sender}>"
-    msg['To'] = admin
-    msg['Subject'] = "Top 10 — New Lead Captured"
-    msg.set_content(
-        f"User Email: {user_email}\nSearch Query: {prompt}\nGenerated At: {time.strftime('%Y-%m-%d %H:%M:%S')}"
-    )
+        REDIS = None
+
+def _redis_get_json(key: str):
+    if REDIS is None:
+        return None
+    try:
+        raw = REDIS.get(key)
+        return orjson.loads(raw) if raw else None
+    except Exception:
+        return None
+
+def _redis_set_json(key: str, value, ttl: int) -> None:
+    if REDIS is None:
+        return
+    try:
+        REDIS.set(key, orjson.dumps(value), ex=ttl)
+    except Exception:
+        pass
 
+# Email jobs go to RQ when Redis is configured; `rq worker emails` runs them.
+EMAIL_QUEUE = None
+if REDIS is not None:
     try:
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-            server.login(sender, password)
-            server.send_message(msg)
-        return {'sent': True}
+        from rq import Queue
+        from rq import Retry as RqRetry
+        from rq.job import Job
+        EMAIL_QUEUE = Queue('emails', connection=REDIS)
     except Exception:
+        EMAIL_QUEUE = None
+
+def _queue_list_email(delivery_id: str, user_email: str, title: str, products: list) -> dict:
+    """Hand the list email off (RQ, else the thread pool) or, on Vercel without RQ, send it now."""
+    if EMAIL_QUEUE is not None:
         try:
-            with smtplib.SMTP("smtp.gmail.com", 587, timeout=20) as server:
-                server.ehlo()
-                server.starttls(context=ssl.create_default_context())
-                server.login(sender, password)
-                server.send_message(msg)
-            return {'sent': True}
-        except Exception as e2:
-            return {'sent': False, 'reason': f'{type(e2).__name__}: {e2}'}
+            EMAIL_QUEUE.enqueue(
+                send_list_email, user_email, title, products,
+                job_id=delivery_id, job_timeout=60, result_ttl=3600, failure_ttl=3600,
+                retry=RqRetry(max=3, interval=[10, 60, 300]),
+            )
+            return {'queued': True}
+        except Exception:
+            pass  # Redis unavailable; send in-process instead
+    if ON_VERCEL:
+        _deliver_email(delivery_id, user_email, title, products)
+        return _get_delivery_status(delivery_id)
+    _set_delivery_status(delivery_id, {'queued': True})
+    EMAIL_POOL.submit(_deliver_email, delivery_id, user_email, title, products)
+    return {'queued': True}
+
+def _rq_delivery_status(delivery_id: str) -> dict | None:
+    if EMAIL_QUEUE is None:
+        return None
+    try:
+        job = Job.fetch(delivery_id, connection=REDIS)
+        state = job.get_status()
+    except Exception:
+        return None
+    if state == 'finished':
+        return job.return_value()
+    if state == 'failed':
+        lines = (job.exc_info or '').strip().splitlines()
+        return {'sent': False, 'reason': lines[-1] if lines else 'failed'}
+    if state in ('stopped', 'canceled'):
+        return {'sent': False, 'reason': f'job {state}'}
+    return {'queued': True}  # queued, started, deferred, or scheduled for a retry
 
 # ---------- Rainforest API client ----------
+# Identical searches within a few minutes ("vitamins", "coffee", ...) are served
+# from memory instead of paying for another Rainforest round trip.
+RF_CACHE_TTL = 300
+_RF_CACHE = TTLCache(maxsize=1024, ttl=RF_CACHE_TTL)
+_RF_CACHE_LOCK = threading.Lock()
+
+def _mk_product(item: dict, aff_tpl: str, az_tpl: str) -> dict:
+    """Map one Rainforest search result to our product shape."""
+    get = item.get
+    asin = item["asin"]
+    title = item["title"]
+    return {
+        "asin": asin,
+        "title": title,
+        "price": (get("price") or {}).get("raw", "Price not available"),
+        "rating": get("rating", 0),
+        "affiliate_link": aff_tpl.format(asin),
+        "image_url": get("image", ""),
+        "description": title,
+        "amazon_url": az_tpl + asin,
+    }
+
 class RainforestApiClient:
     def __init__(self, affiliate_id: str = "ai4u0c-20"):
         self.affiliate_id = affiliate_id
@@ -106,8 +354,34 @@ class RainforestApiClient:
         if not self.api_key:
             raise ValueError("Rainforest API key not found in environment variables")
         self.base_url = "https://api.rainforestapi.com/request"
+        # Product URL prefixes, built once instead of per search result
+        self._aff_tpl = "https://www.amazon.com/dp/{0}?tag=" + affiliate_id
+        self._az_tpl = "https://www.amazon.com/dp/"
 
     def search_products(self, search_term: str, max_results: int = 10):
+        products, _ = self.cached_search(search_term, max_results=max_results)
+        return products
+
+    def cached_search(self, search_term: str, max_results: int = 10):
+        """Return (products, cache_hit); results are cached per normalized term."""
+        key = ((search_term or "").strip().lower(), max_results)
+        with _RF_CACHE_LOCK:
+            hit = _RF_CACHE.get(key)
+        if hit is not None:
+            return copy.deepcopy(hit), True
+
+        # Second tier: shared with other instances (cold serverless invocations)
+        redis_key = f"rf:{max_results}:{hashlib.sha1(key[0].encode()).hexdigest()}"
+        products = _redis_get_json(redis_key)
+        cache_hit = products is not None
+        if not cache_hit:
+            products = self._fetch_products(search_term, max_results)
+            _redis_set_json(redis_key, products, RF_CACHE_TTL)
+        with _RF_CACHE_LOCK:
+            _RF_CACHE[key] = copy.deepcopy(products)
+        return products, cache_hit
+
+    def _fetch_products(self, search_term: str, max_results: int):
         params = {
             "api_key": self.api_key,
             "type": "search",
@@ -117,52 +391,54 @@ class RainforestApiClient:
             "output": "json",
         }
         try:
-            resp = requests.get(self.base_url, params=params, timeout=20)
+            resp = _get_with_retry(self.base_url, params=params, headers={"Accept-Encoding": "gzip"})
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
             if "search_results" not in data:
                 raise ValueError(f"Invalid response from Rainforest API: {data.get('message', 'No search_results')}")
-            products = []
-            for item in data["search_results"][:max_results]:
-                if not item.get("asin") or not item.get("title"):
-                    continue
-                asin = item.get("asin")
-                products.append({
-                    "asin": asin,
-                    "title": item.get("title"),
-                    "price": (item.get("price") or {}).get("raw", "Price not available"),
-                    "rating": item.get("rating", 0),
-                    "affiliate_link": f"https://www.amazon.com/dp/{asin}?tag={self.affiliate_id}",
-                    "image_url": item.get("image", ""),
-                    "description": item.get("title"),
-                    "amazon_url": f"https://www.amazon.com/dp/{asin}",
-                })
+            aff_tpl, az_tpl = self._aff_tpl, self._az_tpl
+            products = [
+                _mk_product(item, aff_tpl, az_tpl)
+                for item in data["search_results"][:max_results]
+                if item.get("asin") and item.get("title")
+            ]
             return products
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise ConnectionError(f"Failed to connect to Rainforest API: {str(e)}")
         except Exception as e:
             raise
 
 # ---------- Product list generator ----------
+# One case-insensitive scan of the prompt; the first category in
+# CATEGORY_PRIORITY that matched anywhere wins. The alternation sits in a
+# lookahead so every start position is tested: matches may overlap, and a
+# lower-priority keyword can't swallow part of a higher-priority one
+# ("kidsnacks" is grocery, as with plain substring checks).
+CATEGORY_RE = re.compile(
+    r"(?=(?P<grocery>food|snack|chips|candy|coffee|tea|organic|grocery)"
+    r"|(?P<baby>baby|diaper|infant|toddler|kids|children)"
+    r"|(?P<beauty>skincare|beauty|makeup|cosmetic|anti-aging)"
+    r"|(?P<electronics>phone|smartphone|laptop|headphone|gaming))",
+    re.IGNORECASE,
+)
+CATEGORY_PRIORITY = ('grocery', 'baby', 'beauty', 'electronics')
+CATEGORY_SEARCH_SUFFIX = {'grocery': 'food', 'baby': 'baby', 'beauty': 'beauty', 'electronics': ''}
+
 class ProductListGenerator:
     def __init__(self):
         self.api_client = RainforestApiClient()
 
     def intelligent_category_analysis(self, prompt: str):
-        p = (prompt or "").lower()
-        if any(w in p for w in ['food', 'snack', 'chips', 'candy', 'coffee', 'tea', 'organic', 'grocery']):
-            return {'category': 'grocery', 'search_terms': f"{prompt} food"}
-        if any(w in p for w in ['baby', 'diaper', 'infant', 'toddler', 'kids', 'children']):
-            return {'category': 'baby', 'search_terms': f"{prompt} baby"}
-        if any(w in p for w in ['skincare', 'beauty', 'makeup', 'cosmetic', 'anti-aging']):
-            return {'category': 'beauty', 'search_terms': f"{prompt} beauty"}
-        if any(w in p for w in ['phone', 'smartphone', 'laptop', 'headphone', 'gaming']):
-            return {'category': 'electronics', 'search_terms': prompt}
+        found = {m.lastgroup for m in CATEGORY_RE.finditer(prompt or "")}
+        for category in CATEGORY_PRIORITY:
+            if category in found:
+                suffix = CATEGORY_SEARCH_SUFFIX[category]
+                return {'category': category, 'search_terms': f"{prompt} {suffix}" if suffix else prompt}
         return {'category': 'general', 'search_terms': prompt}
 
     def generate_top10_list(self, prompt: str):
         category_info = self.intelligent_category_analysis(prompt)
-        products = self.api_client.search_products(category_info['search_terms'], max_results=10)
+        products, cache_hit = self.api_client.cached_search(category_info['search_terms'], max_results=10)
         if not products:
             return {'success': False, 'error': f"No products found for '{prompt}'. Try a different term."}
 
@@ -179,9 +455,15 @@ class ProductListGenerator:
             'category': category_info['category'],
             'products': products,
             'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'affiliate_id': self.api_client.affiliate_id
+            'affiliate_id': self.api_client.affiliate_id,
+            'cache_hit': cache_hit
         }
 
+@functools.lru_cache(maxsize=1)
+def get_generator() -> ProductListGenerator:
+    """Shared generator, built on first use so a missing API key surfaces per request."""
+    return ProductListGenerator()
+
 # ---------- API Routes ----------
 @app.route('/api/generate-list', methods=['POST'])
 def generate_list():
@@ -192,68 +474,43 @@ def generate_list():
 
         if not prompt:
             return jsonify({'success': False, 'error': 'Prompt is required'}), 400
+        # Reject undeliverable addresses before spending Rainforest quota on them
+        if user_email and not safe_email(user_email):
+            return jsonify({'success': False, 'error': 'Email address is invalid or cannot receive mail'}), 400
 
-        generator = ProductListGenerator()
-        result = generator.generate_top10_list(prompt)
+        result = get_generator().generate_top10_list(prompt)
 
         if result.get('success'):
             # Generate a share URL ID (placeholder—implement persistence later if needed)
-            list_id = str(uuid.uuid4())[:8]
+            list_id = secrets.token_hex(4)
             list_url = f"https://ai4u-top10-lists.vercel.app/list/{list_id}"
             result['share_url'] = list_url
             result['list_id'] = list_id
 
             # OPTIONAL: email the list if user provided an address (non-blocking UX)
             if user_email and result.get('products'):
-                # Build a compact, mobile-friendly HTML
-                rows = []
-                for i, p in enumerate(result['products'], start=1):
-                    title_txt = p.get('title', 'Untitled')
-                    price = p.get('price', '')
-                    rating = p.get('rating', '')
-                    asin = p.get('asin', '')
-                    aff = _absolutize(p.get('affiliate_link') or p.get('amazon_url') or '#')
-                    img = p.get('image_url', '')
-                    rows.append(f"""
-                      <tr>
-                        <td style="padding:12px 0;border-bottom:1px solid #eee;">
-                          <div style="font-weight:600;">{i}. {title_txt}</div>
-                          <div style="font-size:13px;color:#666;">ASIN: {asin}</div>
-                          <div style="font-size:13px;color:#666;">Price: {price} &nbsp; • &nbsp; Rating: {rating}</div>
-                          <div style="margin:8px 0;">
-                            <a href="{aff}" style="display:inline-block;background:#6c47ff;color:#fff;text-decoration:none;padding:8px 14px;border-radius:8px;">View on Amazon</a>
-                          </div>
-                          {f'<img src="{img}" alt="" style="max-width:120px;border-radius:8px;">' if img else ''}
-                        </td>
-                      </tr>
-                    """)
-
-                html = f"""
-                <div style="font-family:ui-sans-serif,system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial">
-                  <h2 style="margin:0 0 12px">{result.get('title','Your Top 10')}</h2>
-                  <p style="margin:0 0 16px;color:#444">Here’s your AI-researched Top 10 list.</p>
-                  <table width="100%" cellpadding="0" cellspacing="0" style="border-collapse:collapse">
-                    {''.join(rows)}
-                  </table>
-                  <p style="margin-top:18px;color:#888;font-size:12px">
-                    Sent by AI4U Top 10. Links may include affiliate tags.
-                  </p>
-                </div>
-                """
-
-                result['email_status'] = send_email_html(
-                    to_email=user_email,
-                    subject=result.get('title', 'Your Top 10 List'),
-                    html_body=html,
-                    bcc=os.environ.get('ADMIN_EMAIL') or None
-                )
-                # Optional admin ping (best-effort; ignore failures)
-                _ = send_admin_lead(user_email, prompt)
+                delivery_id = secrets.token_hex(4)
+                result['email_status'] = _queue_list_email(delivery_id, user_email, result.get('title'), result['products'])
+                # Optional admin ping (batched into a periodic digest)
+                notify_admin_lead(user_email, prompt, list_id)
+                if _delivery_status_pollable():
+                    result['delivery_id'] = delivery_id
+                    result['email_status_url'] = f"/api/email-status/{delivery_id}"
 
+        # Not streamed: the result is built (and cached) whole and the email needs
+        # it whole too, so streaming would save no memory or time-to-first-byte.
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/email-status/<delivery_id>', methods=['GET'])
+def email_status(delivery_id):
+    # Needs Redis (or the single-process dev server); see _DELIVERIES above
+    status = _get_delivery_status(delivery_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Unknown delivery_id'}), 404
+    return jsonify({'success': True, 'delivery_id': delivery_id, 'email_status': status})
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     has_rf = bool(os.environ.get('RAINFOREST_API_KEY'))
@@ -306,4 +563,5 @@ def test_page():
 if __name__ == '__main__':
     print("Starting AI4U Top 10 Backend")
     print(f"Rainforest key configured: {'Yes' if os.environ.get('RAINFOREST_API_KEY') else 'No'}")
-    app.run(host='127.0.0.1', port=5000, debug=True)
+    LOCAL_DELIVERY_STATUS = True  # one process, so in-memory email status can be polled
+    app.run(host='127.0.0.1', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1')
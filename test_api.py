@@ -1,5 +1,5 @@
 import os
-import requests
+import httpx
 from dotenv import load_dotenv
 
 # Load .env file
@@ -20,7 +20,7 @@ if api_key:
             "sort_by": "featured"
         }
         
-        response = requests.get("https://api.rainforestapi.com/request", params=params)
+        response = httpx.get("https://api.rainforestapi.com/request", params=params, timeout=20)
         response.raise_for_status()
         
         data = response.json()
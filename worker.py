@@ -0,0 +1,250 @@
+# worker.py — list email / admin lead digest rendering + Gmail SMTP delivery.
+# Imported by app.py; also run standalone as an RQ worker (see Procfile):
+#   rq worker -w rq.worker.SimpleWorker --with-scheduler emails
+# SimpleWorker runs jobs in-process, so SMTP_POOL connections persist across jobs
+# (the default forking worker would start every job with an empty pool).
+# --with-scheduler is required: retries with an interval wait in RQ's scheduled
+# registry and only a scheduler moves them back onto the queue, and the delayed
+# lead-digest flush (enqueue_in) is scheduled the same way.
+import os, time, queue, threading, smtplib, ssl
+import orjson
+from urllib.parse import urlparse
+from email.message import EmailMessage
+from contextlib import contextmanager
+from jinja2 import Environment
+from rq import get_current_job
+
+# Try to load .env locally; on Vercel we rely on project env vars
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except Exception:
+    pass
+
+# ---------- Email helpers (Option A: Gmail SMTP + App Password) ----------
+def _absolutize(url: str) -> str:
+    """Return absolute URL; if already absolute, return as-is."""
+    try:
+        u = urlparse(url or "")
+        if u.scheme and u.netloc:
+            return url
+    except Exception:
+        pass
+    return url  # your links are already absolute; keep as safety
+
+# Compact, mobile-friendly list email. Parsed once at import; autoescaped so
+# product titles from Amazon can't inject markup.
+EMAIL_TEMPLATE = """
+<div style="font-family:ui-sans-serif,system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial">
+  <h2 style="margin:0 0 12px">{{ title }}</h2>
+  <p style="margin:0 0 16px;color:#444">Here’s your AI-researched Top 10 list.</p>
+  <table width="100%" cellpadding="0" cellspacing="0" style="border-collapse:collapse">
+    {% for i, p in products %}
+    <tr>
+      <td style="padding:12px 0;border-bottom:1px solid #eee;">
+        <div style="font-weight:600;">{{ i }}. {{ p.get('title', 'Untitled') }}</div>
+        <div style="font-size:13px;color:#666;">ASIN: {{ p.get('asin', '') }}</div>
+        <div style="font-size:13px;color:#666;">Price: {{ p.get('price', '') }} &nbsp; • &nbsp; Rating: {{ p.get('rating', '') }}</div>
+        <div style="margin:8px 0;">
+          <a href="{{ (p.get('affiliate_link') or p.get('amazon_url') or '#') | absolutize }}" style="display:inline-block;background:#6c47ff;color:#fff;text-decoration:none;padding:8px 14px;border-radius:8px;">View on Amazon</a>
+        </div>
+        {% if p.get('image_url') %}<img src="{{ p.get('image_url') }}" alt="" style="max-width:120px;border-radius:8px;">{% endif %}
+      </td>
+    </tr>
+    {% endfor %}
+  </table>
+  <p style="margin-top:18px;color:#888;font-size:12px">
+    Sent by AI4U Top 10. Links may include affiliate tags.
+  </p>
+</div>
+"""
+
+_jinja = Environment(autoescape=True)
+_jinja.filters['absolutize'] = _absolutize
+_EMAIL_TPL = _jinja.from_string(EMAIL_TEMPLATE)
+
+def render_email_html(title: str, products: list) -> str:
+    """Render the Top 10 list email body."""
+    return _EMAIL_TPL.render(title=title, products=list(enumerate(products, 1)))
+
+class SmtpPool:
+    """
+    Small pool of logged-in Gmail SMTP_SSL connections reused across sends.
+    Connections are recycled after `max_sends` messages or `max_age` seconds,
+    and at most `maxsize` are open at once (Gmail caps concurrent sessions).
+    """
+    def __init__(self, host: str = "smtp.gmail.com", port: int = 465, maxsize: int = 5,
+                 max_sends: int = 100, max_age: float = 300, timeout: float = 20):
+        self.host = host
+        self.port = port
+        self.max_sends = max_sends
+        self.max_age = max_age
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  # (conn, created_at, sent_count)
+        self._slots = threading.BoundedSemaphore(maxsize)
+
+    def _connect(self):
+        conn = smtplib.SMTP_SSL(self.host, self.port, context=ssl.create_default_context(), timeout=self.timeout)
+        conn.login(os.environ.get('EMAIL_USER'), os.environ.get('EMAIL_PASSWORD'))
+        return conn, time.monotonic(), 0
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _alive(self, conn, created_at: float) -> bool:
+        if time.monotonic() - created_at > self.max_age:
+            return False
+        try:
+            return conn.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, created_at, sent = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._alive(conn, created_at):
+                return conn, created_at, sent
+            self._close(conn)
+
+    @contextmanager
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            conn, created_at, sent = self._checkout()
+            try:
+                yield conn
+            except Exception:
+                self._close(conn)  # state unknown after a failed send; rebuild next time
+                raise
+            sent += 1
+            if sent >= self.max_sends or time.monotonic() - created_at > self.max_age:
+                self._close(conn)
+            else:
+                self._idle.put((conn, created_at, sent))
+        finally:
+            self._slots.release()
+
+SMTP_POOL = SmtpPool()
+
+def smtp_send(msg: EmailMessage) -> dict:
+    """Send via the pooled connection; retry once on a fresh one if the server hung up."""
+    for attempt in (1, 2):
+        try:
+            with SMTP_POOL.acquire() as conn:
+                conn.send_message(msg)
+            return {'sent': True}
+        except smtplib.SMTPServerDisconnected as e:
+            if attempt == 2:
+                return {'sent': False, 'reason': f'{type(e).__name__}: {e}'}
+        except Exception as e:
+            return {'sent': False, 'reason': f'{type(e).__name__}: {e}'}
+
+def send_email_html(to_email: str, subject: str, html_body: str, bcc: str | None = None) -> dict:
+    """
+    Send HTML email via Gmail SMTP. Requires:
+      - EMAIL_USER = your Gmail address
+      - EMAIL_PASSWORD = 16-char App Password (not your normal password)
+    Returns: {'sent': True} or {'sent': False, 'reason': '...'}
+    """
+    sender = os.environ.get('EMAIL_USER')
+    password = os.environ.get('EMAIL_PASSWORD')
+    if not sender or not password or not to_email:
+        return {'sent': False, 'reason': 'missing_email_config_or_to'}
+
+    msg = EmailMessage()
+    msg['From'] = f"AI4U Top 10 <{sender}>"
+    msg['To'] = to_email
+    if bcc:
+        msg['Bcc'] = bcc
+    msg['Subject'] = subject
+    msg.set_content("HTML email. Please view with an HTML-capable client.")
+    msg.add_alternative(html_body, subtype='html')
+
+    return smtp_send(msg)
+
+LEAD_DIGEST_TEMPLATE = """
+<div style="font-family:ui-sans-serif,system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial">
+  <h2 style="margin:0 0 12px">{{ leads|length }} new lead{{ 's' if leads|length != 1 }}</h2>
+  <table cellpadding="6" cellspacing="0" style="border-collapse:collapse;font-size:13px">
+    <tr style="text-align:left;color:#666"><th>Generated At</th><th>User Email</th><th>Search Query</th><th>List</th></tr>
+    {% for ts, email, prompt, req_id in leads %}
+    <tr style="border-top:1px solid #eee"><td>{{ ts }}</td><td>{{ email }}</td><td>{{ prompt }}</td><td>{{ req_id }}</td></tr>
+    {% endfor %}
+  </table>
+</div>
+"""
+_LEAD_DIGEST_TPL = _jinja.from_string(LEAD_DIGEST_TEMPLATE)
+
+def send_lead_digest(leads: list) -> dict:
+    """Email ADMIN_EMAIL one digest of captured leads (best-effort)."""
+    sender = os.environ.get('EMAIL_USER')
+    password = os.environ.get('EMAIL_PASSWORD')
+    admin = os.environ.get('ADMIN_EMAIL') or None
+    if not sender or not password or not admin:
+        return {'sent': False, 'reason': 'missing_admin_or_auth'}
+
+    msg = EmailMessage()
+    msg['From'] = f"AI4U Top 10 <{sender}>"
+    msg['To'] = admin
+    msg['Subject'] = f"Top 10 — {len(leads)} New Lead{'s' if len(leads) != 1 else ''} Captured"
+    msg.set_content("\n\n".join(
+        f"User Email: {email}\nSearch Query: {prompt}\nGenerated At: {ts}" for ts, email, prompt, _ in leads
+    ))
+    msg.add_alternative(_LEAD_DIGEST_TPL.render(leads=leads), subtype='html')
+
+    return smtp_send(msg)
+
+# ---------- Jobs ----------
+def send_list_email(user_email: str, title: str, products: list, raise_on_failure: bool = True) -> dict:
+    """
+    Render a Top 10 list email and send it to `user_email` (BCC ADMIN_EMAIL).
+    As an RQ job, SMTP failures raise so the queue's retry policy re-runs it;
+    missing email config is returned as-is since retrying won't help.
+    """
+    status = send_email_html(
+        to_email=user_email,
+        subject=title or 'Your Top 10 List',
+        html_body=render_email_html(title or 'Your Top 10', products),
+        bcc=os.environ.get('ADMIN_EMAIL') or None,
+    )
+    if raise_on_failure and not status.get('sent') and status.get('reason') != 'missing_email_config_or_to':
+        raise RuntimeError(status.get('reason'))
+    return status
+
+# Leads waiting for the next admin digest, shared by all web instances when
+# Redis is configured (app.notify_admin_lead appends, flush_lead_digest drains).
+LEADS_KEY = "leads:pending"
+LEADS_FLUSH_KEY = "leads:flush-scheduled"
+LEADS_MAX = 1000
+
+def flush_lead_digest() -> dict | None:
+    """
+    RQ job: mail one digest of every lead pending in Redis. On an SMTP failure
+    the leads go back to the head of the list (newest kept if over LEADS_MAX)
+    and the job raises so RQ retries it.
+    """
+    conn = get_current_job().connection
+    pipe = conn.pipeline()
+    pipe.lrange(LEADS_KEY, 0, -1)
+    pipe.delete(LEADS_KEY)
+    raw = pipe.execute()[0]
+    if not raw:
+        return None
+    status = send_lead_digest([tuple(orjson.loads(r)) for r in raw])
+    if not status.get('sent') and status.get('reason') != 'missing_admin_or_auth':
+        pipe = conn.pipeline()
+        pipe.lpush(LEADS_KEY, *reversed(raw))
+        pipe.ltrim(LEADS_KEY, -LEADS_MAX, -1)
+        pipe.execute()
+        raise RuntimeError(status.get('reason'))
+    return status